@@ -1,19 +1,23 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
-import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime
 import time
+import math
 import os
-from typing import Dict, List, Optional, Tuple
+import io
+import sys
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 import logging
-from collections import deque
 import threading
-import numpy as np
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 import sqlite3
 import hashlib
 from dataclasses import dataclass
 import re
+import random
 
 # Try to import additional packages for RAG functionality
 try:
@@ -31,6 +35,20 @@ except ImportError:
     CHROMADB_AVAILABLE = False
     print("chromadb not available. Install with: pip install chromadb")
 
+# xlsxwriter writes Excel reports faster than openpyxl; fall back to openpyxl without it
+try:
+    import xlsxwriter
+    XLSXWRITER_AVAILABLE = True
+except ImportError:
+    XLSXWRITER_AVAILABLE = False
+
+# orjson serializes the JSON report much faster than the stdlib encoder
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 # Try to import dotenv, but don't fail if it's not available
 try:
     from dotenv import load_dotenv
@@ -38,6 +56,12 @@ try:
 except ImportError:
     print("python-dotenv not installed. Please set environment variables manually if needed.")
 
+class QuotaExceeded(RuntimeError):
+    """Raised by RateLimiter when the daily request budget is used up"""
+
+class OllamaError(Exception):
+    """Raised when Ollama cannot produce a response (HTTP error, model error or connection failure)"""
+
 @dataclass
 class LandParcel:
     """Data class for land parcel information"""
@@ -61,47 +85,73 @@ class LandParcel:
 
 class RateLimiter:
     """
-    Rate limiter for API calls (keeping for potential future API integrations)
+    Token-bucket rate limiter for AI model calls; only blocks when a bucket runs dry
     """
     def __init__(self, requests_per_minute: int = 60, requests_per_day: int = 1000):
         self.requests_per_minute = requests_per_minute
         self.requests_per_day = requests_per_day
-        self.minute_requests = deque()
-        self.daily_requests = deque()
-        self.lock = threading.Lock()
         
-    def wait_if_needed(self):
-        """Wait if necessary to respect rate limits"""
+        # Each bucket is (tokens, last_refill_ms), refilled lazily at a constant rate per ms
+        now_ms = self._now_ms()
+        self._minute_rate = requests_per_minute / 60_000
+        self._day_rate = requests_per_day / 86_400_000
+        self._minute_state = (float(requests_per_minute), now_ms)
+        self._day_state = (float(requests_per_day), now_ms)
+        self.lock = threading.Lock()
+    
+    @staticmethod
+    def _now_ms() -> int:
+        """Monotonic clock in milliseconds"""
+        return time.monotonic_ns() // 1_000_000
+    
+    @staticmethod
+    def _refill(state: Tuple[float, int], rate: float, capacity: int, now_ms: int) -> float:
+        """Return the bucket's token count at now_ms"""
+        tokens, last_ms = state
+        return min(float(capacity), tokens + (now_ms - last_ms) * rate)
+        
+    def wait_if_needed(self) -> Dict[str, int]:
+        """Wait if necessary to respect rate limits; returns the quota left after this request"""
         with self.lock:
-            now = datetime.now()
-            
-            # Clean old requests from tracking
-            minute_ago = now - timedelta(minutes=1)
-            while self.minute_requests and self.minute_requests[0] < minute_ago:
-                self.minute_requests.popleft()
-                
-            day_ago = now - timedelta(days=1)
-            while self.daily_requests and self.daily_requests[0] < day_ago:
-                self.daily_requests.popleft()
+            now_ms = self._now_ms()
+            day_tokens = self._refill(self._day_state, self._day_rate, self.requests_per_day, now_ms)
+            minute_tokens = self._refill(self._minute_state, self._minute_rate, self.requests_per_minute, now_ms)
             
             # Check daily limit
-            if len(self.daily_requests) >= self.requests_per_day:
-                raise Exception(f"Daily API limit reached ({self.requests_per_day} requests). Please try again tomorrow.")
+            if day_tokens < 1:
+                raise QuotaExceeded(f"Daily API limit reached ({self.requests_per_day} requests). Please try again tomorrow.")
             
-            # Check minute limit and wait if needed
-            if len(self.minute_requests) >= self.requests_per_minute:
-                # Need to wait until oldest request is > 1 minute old
-                oldest_request = self.minute_requests[0]
-                wait_until = oldest_request + timedelta(minutes=1, seconds=1)
-                wait_time = (wait_until - now).total_seconds()
-                
-                if wait_time > 0:
-                    print(f"Rate limit reached. Waiting {wait_time:.1f} seconds...")
-                    time.sleep(wait_time)
+            # Check minute limit and wait until the next token has dripped in
+            if minute_tokens < 1:
+                wait_ms = math.ceil((1 - minute_tokens) / self._minute_rate)
+                print(f"Rate limit reached. Waiting {wait_ms / 1000:.1f} seconds...")
+                time.sleep(wait_ms / 1000)
+                now_ms += wait_ms
+                minute_tokens = 1.0
             
             # Record this request
-            self.minute_requests.append(now)
-            self.daily_requests.append(now)
+            self._minute_state = (minute_tokens - 1, now_ms)
+            self._day_state = (day_tokens - 1, now_ms)
+            return {
+                "minute_remaining": int(minute_tokens - 1),
+                "daily_remaining": int(day_tokens - 1)
+            }
+    
+    def penalize(self):
+        """Back off after the server rejected a request: drive the minute bucket below empty"""
+        with self.lock:
+            now_ms = self._now_ms()
+            minute_tokens = self._refill(self._minute_state, self._minute_rate, self.requests_per_minute, now_ms)
+            self._minute_state = (min(-1.0, minute_tokens - 1), now_ms)
+    
+    def get_remaining_quota(self) -> Dict[str, int]:
+        """Requests still available this minute and today, without consuming any"""
+        with self.lock:
+            now_ms = self._now_ms()
+            return {
+                "minute_remaining": max(0, int(self._refill(self._minute_state, self._minute_rate, self.requests_per_minute, now_ms))),
+                "daily_remaining": max(0, int(self._refill(self._day_state, self._day_rate, self.requests_per_day, now_ms)))
+            }
 
 class LandDatabase:
     """
@@ -223,6 +273,17 @@ class LandDatabase:
         conn.close()
         return parcels
     
+    def count_parcels(self) -> int:
+        """Count land parcels without loading them"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        cursor.execute('SELECT COUNT(*) FROM land_parcels')
+        count = cursor.fetchone()[0]
+        
+        conn.close()
+        return count
+    
     def search_parcels(self, filters: Dict) -> List[LandParcel]:
         """Search land parcels with filters"""
         conn = sqlite3.connect(self.db_path)
@@ -281,6 +342,65 @@ class LandDatabase:
         conn.close()
         return parcels
 
+class ResponseCache:
+    """
+    SQLite-backed cache of AI responses keyed by a hash of the prompt and model settings
+    """
+    def __init__(self, db_path: str = "ollama_cache.db", ttl_seconds: int = 7 * 86400):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.init_database()
+
+    def init_database(self):
+        """Initialize the SQLite database with the responses table"""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('''
+        CREATE TABLE IF NOT EXISTS responses (
+            cache_key TEXT PRIMARY KEY,
+            response TEXT NOT NULL,
+            created_at REAL NOT NULL
+        )
+        ''')
+        conn.commit()
+        conn.close()
+
+    @staticmethod
+    def make_key(prompt: str, model: str, max_tokens: int, temperature: float) -> str:
+        """Build the cache key for a prompt and its generation settings"""
+        return hashlib.sha256(f"{model}|{max_tokens}|{temperature}|{prompt}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str, ttl_seconds: Optional[int] = None) -> Optional[str]:
+        """Return the cached response for a key, or None if missing or older than the TTL"""
+        entry = self.get_entry(key, ttl_seconds)
+        return entry[0] if entry is not None else None
+
+    def get_entry(self, key: str, ttl_seconds: Optional[int] = None) -> Optional[Tuple[str, float]]:
+        """Return (response, created_at) for a key, or None if missing or older than the TTL"""
+        conn = sqlite3.connect(self.db_path)
+        row = conn.execute(
+            'SELECT response, created_at FROM responses WHERE cache_key = ?', (key,)
+        ).fetchone()
+        conn.close()
+
+        if row is None or self.is_expired(row[1], ttl_seconds):
+            return None
+        return row[0], row[1]
+
+    def is_expired(self, created_at: float, ttl_seconds: Optional[int] = None) -> bool:
+        """Whether an entry created at created_at is older than the TTL (default: the cache's own)"""
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        return time.time() - created_at > ttl
+
+    def set(self, key: str, response: str):
+        """Store a response under a key"""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(
+            'INSERT OR REPLACE INTO responses (cache_key, response, created_at) VALUES (?, ?, ?)',
+            (key, response, time.time())
+        )
+        conn.commit()
+        conn.close()
+
 class RAGSystem:
     """
     RAG (Retrieval-Augmented Generation) system for land and real estate knowledge
@@ -317,6 +437,10 @@ class RAGSystem:
         else:
             self.client = None
             self.collection = None
+        
+        # Assembled contexts per (query, max length); the analyses ask the same questions
+        # on every run, so each query is embedded and searched only once
+        self._context_cache: Dict[Tuple[str, int], str] = {}
     
     def add_document(self, doc_id: str, text: str, metadata: Dict = None):
         """Add a document to the RAG system"""
@@ -331,6 +455,7 @@ class RAGSystem:
                 documents=[text],
                 metadatas=[metadata or {}]
             )
+            self._context_cache.clear()
             return True
         except Exception as e:
             print(f"Error adding document: {e}")
@@ -432,6 +557,11 @@ class RAGSystem:
     
     def get_context_for_query(self, query: str, max_context_length: int = 2000) -> str:
         """Get relevant context for a query"""
+        cache_key = (query, max_context_length)
+        cached = self._context_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         similar_docs = self.search_similar(query, n_results=3)
         
         if not similar_docs:
@@ -450,7 +580,9 @@ class RAGSystem:
             context_parts.append(doc_text)
             current_length += len(doc_text)
         
-        return "\n\n".join(context_parts)
+        context = "\n\n".join(context_parts)
+        self._context_cache[cache_key] = context
+        return context
 
 class SriLankaRealEstateRAGAgent:
     """
@@ -458,241 +590,18 @@ class SriLankaRealEstateRAGAgent:
     Uses local Ollama with Llama3:8b for AI processing
     """
     
-    def __init__(self, 
-                 ollama_base_url: str = "http://localhost:11434",
-                 ollama_model: str = "llama3:8b",
-                 db_path: str = "sri_lanka_real_estate.db",
-                 vector_db_path: str = "./rag_db"):
-        
-        # Initialize components
-        self.ollama_base_url = ollama_base_url
-        self.ollama_model = ollama_model
-        self.rate_limiter = RateLimiter()  # Keep for potential future use
-        
-        # Initialize database and RAG system
-        self.land_db = LandDatabase(db_path)
-        self.rag_system = RAGSystem(vector_db_path)
-        
-        # Test Ollama connection
-        self._test_ollama_connection()
-        
-        # Setup logging
-        logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-        self.logger = logging.getLogger(__name__)
-        
-        # Initialize knowledge base
-        print("🔄 Initializing RAG knowledge base...")
-        self.rag_system.populate_knowledge_base()
-        
-        # Load sample land data if database is empty
-        self._initialize_sample_land_data()
-        
-        print("✅ Sri Lanka Real Estate RAG Agent initialized successfully!")
-    
-    def _test_ollama_connection(self):
-        """Test connection to Ollama"""
-        try:
-            response = requests.get(f"{self.ollama_base_url}/api/tags", timeout=10)
-            if response.status_code == 200:
-                models = response.json().get('models', [])
-                model_names = [model['name'] for model in models]
-                if self.ollama_model in model_names:
-                    print(f"✅ Connected to Ollama - Model {self.ollama_model} available")
-                else:
-                    print(f"⚠️  Model {self.ollama_model} not found. Available models: {model_names}")
-                    print(f"Run: ollama pull {self.ollama_model}")
-            else:
-                raise Exception(f"Ollama responded with status: {response.status_code}")
-        except Exception as e:
-            print(f"❌ Failed to connect to Ollama: {e}")
-            print("Make sure Ollama is running: ollama serve")
-            print(f"And model is pulled: ollama pull {self.ollama_model}")
+    # Areas covered by run_comprehensive_rag_analysis when none are given
+    DEFAULT_FOCUS_AREAS = ("Ella", "Sigiriya", "Arugam Bay", "Kandy", "Galle")
     
-    def _initialize_sample_land_data(self):
-        """Initialize sample land data if database is empty"""
-        existing_parcels = self.land_db.get_all_parcels()
-        if len(existing_parcels) > 0:
-            print(f"📊 Database already contains {len(existing_parcels)} land parcels")
-            return
-        
-        print("🔄 Initializing sample land data...")
-        
-        sample_lands = [
-            LandParcel(
-                location="Ella - Nine Arch Bridge Area",
-                district="Badulla",
-                province="Uva",
-                area_acres=2.5,
-                price_per_acre=20000,
-                total_price=50000,
-                proximity_to_attractions=["Nine Arch Bridge", "Little Adam's Peak", "Ella Rock"],
-                accessibility="A23 Highway, Railway Station 1km",
-                zoning="Tourism Development Zone",
-                utilities=["Electricity", "Water", "Internet"],
-                strategic_advantages=["Prime tourism location", "Railway connectivity", "Mountain views", "Cool climate"],
-                coordinates=(6.8721, 81.0464),
-                elevation=1041,
-                soil_type="Red earth, well-drained",
-                water_access="Natural springs, municipal supply",
-                development_potential=9
-            ),
-            LandParcel(
-                location="Sigiriya - Cultural Triangle",
-                district="Matale",
-                province="Central",
-                area_acres=5.0,
-                price_per_acre=15000,
-                total_price=75000,
-                proximity_to_attractions=["Sigiriya Rock", "Dambulla Cave Temple", "Minneriya National Park"],
-                accessibility="A6 Highway, 3km from main road",
-                zoning="Archaeological Heritage Zone",
-                utilities=["Electricity", "Well water", "Mobile coverage"],
-                strategic_advantages=["UNESCO proximity", "Safari tourism", "Cultural significance", "Government development zone"],
-                coordinates=(7.9568, 80.7597),
-                elevation=200,
-                soil_type="Alluvial, fertile",
-                water_access="Bore well, seasonal tank",
-                development_potential=8
-            ),
-            LandParcel(
-                location="Arugam Bay - Surf Point",
-                district="Ampara",
-                province="Eastern",
-                area_acres=1.8,
-                price_per_acre=12000,
-                total_price=21600,
-                proximity_to_attractions=["Main Point surf break", "Elephant Rock", "Kumana National Park"],
-                accessibility="A4 Highway coastal road",
-                zoning="Coastal Tourism Zone",
-                utilities=["Solar power potential", "Bore well water", "4G coverage"],
-                strategic_advantages=["World-class surfing", "Beachfront potential", "International surf community", "Growing nomad hub"],
-                coordinates=(6.8402, 81.8344),
-                elevation=5,
-                soil_type="Sandy coastal, drainage good",
-                water_access="Bore well, rainwater harvesting potential",
-                development_potential=9
-            ),
-            LandParcel(
-                location="Kandy Hills - Peradeniya",
-                district="Kandy",
-                province="Central",
-                area_acres=3.2,
-                price_per_acre=28000,
-                total_price=89600,
-                proximity_to_attractions=["Kandy City", "Botanical Gardens", "Temple of Tooth", "University"],
-                accessibility="A1 Highway, city bus routes",
-                zoning="Residential/Commercial Mixed",
-                utilities=["Full utilities", "High-speed internet", "Gas supply"],
-                strategic_advantages=["Cultural capital proximity", "University town", "Established luxury market", "Year-round tourism"],
-                coordinates=(7.2496, 80.5906),
-                elevation=465,
-                soil_type="Hill country, terraced potential",
-                water_access="Municipal supply, natural streams",
-                development_potential=8
-            ),
-            LandParcel(
-                location="Galle Fort Vicinity",
-                district="Galle",
-                province="Southern",
-                area_acres=1.0,
-                price_per_acre=45000,
-                total_price=45000,
-                proximity_to_attractions=["Galle Fort", "Unawatuna Beach", "Jungle Beach", "Cricket Stadium"],
-                accessibility="Southern Expressway, A2 coastal road",
-                zoning="Heritage Tourism Zone",
-                utilities=["Full utilities", "High-speed fiber", "Premium services"],
-                strategic_advantages=["UNESCO heritage", "Boutique hotel market", "International connectivity", "Established luxury tourism"],
-                coordinates=(6.0329, 80.2168),
-                elevation=15,
-                soil_type="Coastal red earth",
-                water_access="Municipal supply, well backup",
-                development_potential=10
-            ),
-            LandParcel(
-                location="Trincomalee - Uppuveli Beach",
-                district="Trincomalee",
-                province="Eastern",
-                area_acres=4.5,
-                price_per_acre=8000,
-                total_price=36000,
-                proximity_to_attractions=["Uppuveli Beach", "Koneswaram Temple", "Whale watching", "Hot Wells"],
-                accessibility="A6 Highway, coastal access",
-                zoning="Coastal Development Zone",
-                utilities=["Electricity expanding", "Bore well", "Mobile coverage"],
-                strategic_advantages=["Pristine beaches", "Emerging destination", "Low competition", "Whale watching hub", "Cultural diversity"],
-                coordinates=(8.5874, 81.2152),
-                elevation=10,
-                soil_type="Sandy loam, coastal",
-                water_access="Bore well, rainwater potential",
-                development_potential=7
-            )
-        ]
-        
-        for parcel in sample_lands:
-            parcel_id = self.land_db.insert_land_parcel(parcel)
-            print(f"✅ Added land parcel: {parcel.location} (ID: {parcel_id})")
-        
-        print(f"📊 Initialized {len(sample_lands)} sample land parcels")
+    # Upper bound on the in-memory response memo; the disk cache holds everything else
+    _RUN_CACHE_MAX_ENTRIES = 256
     
-    def query_ollama(self, prompt: str, max_tokens: int = 2000) -> str:
-        """
-        Query Ollama local AI with a given prompt
-        """
-        try:
-            data = {
-                "model": self.ollama_model,
-                "prompt": prompt,
-                "stream": False,
-                "options": {
-                    "num_ctx": 4096,
-                    "temperature": 0.7,
-                    "num_predict": max_tokens
-                }
-            }
-            
-            response = requests.post(
-                f"{self.ollama_base_url}/api/generate",
-                json=data,
-                timeout=120  # Longer timeout for local processing
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                return result.get('response', 'No response generated')
-            else:
-                self.logger.error(f"Ollama API error: {response.status_code} - {response.text}")
-                return f"Error: {response.status_code} - {response.text}"
-                
-        except Exception as e:
-            self.logger.error(f"Error querying Ollama: {str(e)}")
-            return f"Error: {str(e)}"
+    # Bounded retries for 429/503 from /api/generate; Retry-After is capped in seconds
+    _MAX_RETRIES = 3
+    _MAX_RETRY_AFTER = 60
     
-    def analyze_land_with_rag(self, location: str, investment_budget: float = None) -> Dict:
-        """
-        Analyze land potential using RAG-enhanced context
-        """
-        # Get relevant context from RAG system
-        query = f"real estate investment opportunities strategic location {location} Sri Lanka tourism development"
-        context = self.rag_system.get_context_for_query(query)
-        
-        # Search for matching land parcels in database
-        parcels = self.land_db.search_parcels({"district": location.split()[0]}) if " " in location else []
-        if not parcels:
-            # Search by location name
-            all_parcels = self.land_db.get_all_parcels()
-            parcels = [p for p in all_parcels if location.lower() in p.location.lower()]
-        
-        parcel_info = ""
-        if parcels:
-            parcel_info = f"\n\nAvailable Land Parcels in {location}:\n"
-            for i, parcel in enumerate(parcels[:3], 1):
-                parcel_info += f"{i}. {parcel.location}: {parcel.area_acres} acres at ${parcel.price_per_acre:,}/acre (Total: ${parcel.total_price:,})\n"
-                parcel_info += f"   Strategic advantages: {', '.join(parcel.strategic_advantages[:3])}\n"
-                parcel_info += f"   Development potential: {parcel.development_potential}/10\n"
-        
-        budget_info = f"\nInvestment Budget: ${investment_budget:,}" if investment_budget else ""
-        
-        prompt = f"""
+    # Prompt skeletons are built once; each analysis only fills in its fields
+    _LAND_ANALYSIS_PROMPT = """
         As a Sri Lanka real estate investment expert, analyze the strategic potential of {location} for tourism-related real estate development.
 
         CONTEXT FROM KNOWLEDGE BASE:
@@ -737,20 +646,705 @@ class SriLankaRealEstateRAGAgent:
 
         Be specific with numbers, provide actionable insights, and highlight the strategic advantages that make this location compelling for real estate investment.
         """
-        
-        response = self.query_ollama(prompt)
-        
-        return {
-            "location": location,
-            "timestamp": datetime.now().isoformat(),
-            "analysis_type": "rag_enhanced_land_analysis",
-            "available_parcels": len(parcels),
-            "context_used": len(context) > 100,
-            "investment_budget": investment_budget,
-            "data": response
-        }
+
+    _STRATEGIC_SEARCH_PROMPT = """
+        As a Sri Lanka real estate investment expert, find and recommend the most strategic lands based on these criteria:
+
+        INVESTMENT CRITERIA:
+        {criteria_text}
+
+        RELEVANT MARKET CONTEXT:
+        {context}
+
+        AVAILABLE LAND OPTIONS:
+        {parcel_details}
+
+        Please provide:
+
+        1. TOP STRATEGIC LAND RECOMMENDATIONS:
+           - Rank the best 3-5 options from the available parcels
+           - Explain why each location is strategically advantageous
+           - Match criteria to land characteristics
+
+        2. STRATEGIC LOCATION ANALYSIS:
+           - Tourism potential and visitor flow
+           - Infrastructure and accessibility
+           - Competition and market positioning
+           - Government development plans
+
+        3. INVESTMENT VIABILITY:
+           - Cost-benefit analysis for each recommended parcel
+           - ROI projections and timeline
+           - Risk assessment and mitigation
+           - Financing and legal considerations
+
+        4. DEVELOPMENT STRATEGY:
+           - Optimal development approach for each parcel
+           - Target market and positioning
+           - Phased development recommendations
+           - Partnership and operational strategies
+
+        5. MARKET TIMING:
+           - Current market conditions
+           - Optimal timing for acquisition and development
+           - Seasonal considerations
+           - Economic and tourism trends
+
+        Focus on actionable recommendations with specific reasoning for why each location offers strategic advantages for the intended investment type.
+        """
+
+    _COMPARISON_PROMPT = """
+        Compare these Sri Lankan locations for strategic real estate investment: {locations_str}
+
+        MARKET INTELLIGENCE:
+        {context}
+
+        LAND AVAILABILITY DATA:
+        {comparison_data}
+
+        Provide a comprehensive comparative analysis:
+
+        1. STRATEGIC POSITIONING COMPARISON:
+           - Rank locations by strategic importance (1st, 2nd, 3rd...)
+           - Tourism appeal and market positioning
+           - Infrastructure and accessibility comparison
+           - Unique selling propositions for each
+
+        2. INVESTMENT METRICS COMPARISON:
+           Location | Investment Score | Price Range | ROI Potential | Risk Level
+           [Create a comparison table]
+
+        3. MARKET OPPORTUNITIES:
+           - Best market segments for each location
+           - Competition levels and market saturation
+           - Growth potential and development pipeline
+           - Seasonal performance variations
+
+        4. DEVELOPMENT RECOMMENDATIONS:
+           - Optimal property types for each location
+           - Investment scale recommendations
+           - Timeline for development
+           - Target market positioning
+
+        5. FINAL RECOMMENDATION:
+           - Top choice with detailed justification
+           - Second choice with conditions
+           - Locations to avoid and reasons
+           - Portfolio approach recommendations
+
+        6. RISK ASSESSMENT:
+           - Political and economic risks by location
+           - Market risks and mitigation strategies
+           - Operational challenges specific to each area
+           - Long-term sustainability factors
+
+        Conclude with specific actionable recommendations for investors considering these locations.
+        """
+
+    _INVESTMENT_REPORT_PROMPT = """
+        Generate a comprehensive real estate investment report for Sri Lanka based on this investment profile:
+
+        INVESTOR PROFILE:
+        {profile_text}
+
+        MARKET INTELLIGENCE:
+        {context}
+
+        AVAILABLE INVESTMENT OPTIONS:
+        {investment_options}
+
+        Create a detailed investment report with:
+
+        1. EXECUTIVE SUMMARY:
+           - Investment recommendation overview
+           - Key opportunities identified
+           - Expected returns and timeline
+           - Risk assessment summary
+
+        2. MARKET ANALYSIS:
+           - Sri Lanka tourism market trends
+           - Real estate market conditions
+           - Target segment analysis
+           - Competitive landscape
+
+        3. STRATEGIC LAND RECOMMENDATIONS:
+           - Top 3 recommended parcels with justification
+           - Strategic advantages of each location
+           - Development potential analysis
+           - Risk-return profile for each
+
+        4. FINANCIAL PROJECTIONS:
+           - Initial investment breakdown
+           - Development cost estimates
+           - Revenue projections (Year 1-5)
+           - ROI calculations and break-even analysis
+           - Sensitivity analysis for key variables
+
+        5. DEVELOPMENT STRATEGY:
+           - Recommended property type and scale
+           - Phased development approach
+           - Design and amenity recommendations
+           - Operational strategy
+
+        6. LEGAL AND REGULATORY:
+           - Legal structure for foreign investment
+           - Required approvals and licenses
+           - Tax implications and incentives
+           - Compliance requirements
+
+        7. RISK MANAGEMENT:
+           - Identified risks and mitigation strategies
+           - Insurance requirements
+           - Exit strategy options
+           - Portfolio diversification recommendations
+
+        8. IMPLEMENTATION ROADMAP:
+           - 12-month action plan
+           - Key milestones and timelines
+           - Required partnerships
+           - Success metrics and monitoring
+
+        Make recommendations specific, actionable, and backed by data. Include specific numbers for costs, returns, and timelines.
+        """
+
+    def __init__(self, 
+                 ollama_base_url: str = "http://localhost:11434",
+                 ollama_model: str = "llama3:8b",
+                 db_path: str = "sri_lanka_real_estate.db",
+                 vector_db_path: str = "./rag_db",
+                 cache_path: str = "ollama_cache.db",
+                 max_concurrent_requests: int = 4,
+                 requests_per_minute: int = 60,
+                 temperature: float = 0.7,
+                 num_ctx: int = 4096):
+        
+        # Initialize components
+        self.ollama_base_url = ollama_base_url
+        self.ollama_model = ollama_model
+        self.max_concurrent_requests = max_concurrent_requests
+        self.temperature = temperature
+        self.num_ctx = num_ctx
+        self.rate_limiter = RateLimiter(requests_per_minute=requests_per_minute)
+        
+        # Running totals from the final chunk of every generation
+        self.token_usage = {"requests": 0, "prompt_tokens": 0, "completion_tokens": 0}
+        self._usage_lock = threading.Lock()
+        
+        # Pooled HTTP session so Ollama calls reuse keep-alive connections.
+        # The pool matches the concurrency limit: concurrent calls each keep a
+        # warm connection and never open throwaway ones beyond it
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=max_concurrent_requests,
+            pool_block=True,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.5,
+                # Status retries apply to idempotent requests only (GET /api/tags); the
+                # POST /api/generate path gets no 5xx retries here, and its 429/503 are
+                # retried in _post_generate, which honors Retry-After
+                status_forcelist=[500, 502, 504],
+                respect_retry_after_header=False,
+                # The default idempotent-only methods: a timed-out POST /api/generate may still be
+                # generating, so only connection failures (never sent) are retried for it
+                raise_on_status=False
+            )
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        
+        # Initialize database, response cache and RAG system
+        self.land_db = LandDatabase(db_path)
+        self.response_cache = ResponseCache(cache_path)
+        # In-memory memo of (response, created_at) in front of the disk cache; cleared per
+        # comprehensive run and whenever it reaches _RUN_CACHE_MAX_ENTRIES
+        self._run_cache: Dict[str, Tuple[str, float]] = {}
+        self.rag_system = RAGSystem(vector_db_path)
+        
+        # Test Ollama connection
+        self._test_ollama_connection()
+        
+        # Setup logging
+        logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+        self.logger = logging.getLogger(__name__)
+        
+        # Initialize knowledge base
+        print("🔄 Initializing RAG knowledge base...")
+        self.rag_system.populate_knowledge_base()
+        
+        # Load sample land data if database is empty
+        self._initialize_sample_land_data()
+        
+        print("✅ Sri Lanka Real Estate RAG Agent initialized successfully!")
+    
+    def _test_ollama_connection(self):
+        """Test connection to Ollama"""
+        try:
+            model_names = self._list_ollama_models()
+            if self._is_model_listed(model_names):
+                print(f"✅ Connected to Ollama - Model {self.ollama_model} available")
+            else:
+                print(f"⚠️  Model {self.ollama_model} not found. Available models: {model_names}")
+                print(f"Run: ollama pull {self.ollama_model}")
+        except Exception as e:
+            print(f"❌ Failed to connect to Ollama: {e}")
+            print("Make sure Ollama is running: ollama serve")
+            print(f"And model is pulled: ollama pull {self.ollama_model}")
+    
+    def _list_ollama_models(self) -> List[str]:
+        """Names of the models Ollama has pulled; raises OllamaError on a bad reply"""
+        response = self.session.get(f"{self.ollama_base_url}/api/tags", timeout=10)
+        if response.status_code != 200:
+            raise OllamaError(f"Ollama responded with status: {response.status_code}")
+        try:
+            models = response.json().get('models', [])
+        except ValueError as e:
+            raise OllamaError(f"Invalid /api/tags response: {e}") from e
+        return [model.get('name') for model in models]
+    
+    def _is_model_listed(self, model_names: List[str]) -> bool:
+        """Whether the agent's model is pulled; Ollama lists untagged models as '<name>:latest'"""
+        return bool({self.ollama_model, f"{self.ollama_model}:latest"} & set(model_names))
+    
+    def _probe_ollama_status(self) -> str:
+        """Cheap Ollama health check: 'connected', 'error' or 'disconnected'"""
+        try:
+            model_names = self._list_ollama_models()
+        except OllamaError:
+            return "error"
+        except Exception:
+            return "disconnected"
+        return "connected" if self._is_model_listed(model_names) else "error"
+    
+    def _initialize_sample_land_data(self):
+        """Initialize sample land data if database is empty"""
+        existing_count = self.land_db.count_parcels()
+        if existing_count > 0:
+            print(f"📊 Database already contains {existing_count} land parcels")
+            return
+        
+        print("🔄 Initializing sample land data...")
+        
+        sample_lands = [
+            LandParcel(
+                location="Ella - Nine Arch Bridge Area",
+                district="Badulla",
+                province="Uva",
+                area_acres=2.5,
+                price_per_acre=20000,
+                total_price=50000,
+                proximity_to_attractions=["Nine Arch Bridge", "Little Adam's Peak", "Ella Rock"],
+                accessibility="A23 Highway, Railway Station 1km",
+                zoning="Tourism Development Zone",
+                utilities=["Electricity", "Water", "Internet"],
+                strategic_advantages=["Prime tourism location", "Railway connectivity", "Mountain views", "Cool climate"],
+                coordinates=(6.8721, 81.0464),
+                elevation=1041,
+                soil_type="Red earth, well-drained",
+                water_access="Natural springs, municipal supply",
+                development_potential=9
+            ),
+            LandParcel(
+                location="Sigiriya - Cultural Triangle",
+                district="Matale",
+                province="Central",
+                area_acres=5.0,
+                price_per_acre=15000,
+                total_price=75000,
+                proximity_to_attractions=["Sigiriya Rock", "Dambulla Cave Temple", "Minneriya National Park"],
+                accessibility="A6 Highway, 3km from main road",
+                zoning="Archaeological Heritage Zone",
+                utilities=["Electricity", "Well water", "Mobile coverage"],
+                strategic_advantages=["UNESCO proximity", "Safari tourism", "Cultural significance", "Government development zone"],
+                coordinates=(7.9568, 80.7597),
+                elevation=200,
+                soil_type="Alluvial, fertile",
+                water_access="Bore well, seasonal tank",
+                development_potential=8
+            ),
+            LandParcel(
+                location="Arugam Bay - Surf Point",
+                district="Ampara",
+                province="Eastern",
+                area_acres=1.8,
+                price_per_acre=12000,
+                total_price=21600,
+                proximity_to_attractions=["Main Point surf break", "Elephant Rock", "Kumana National Park"],
+                accessibility="A4 Highway coastal road",
+                zoning="Coastal Tourism Zone",
+                utilities=["Solar power potential", "Bore well water", "4G coverage"],
+                strategic_advantages=["World-class surfing", "Beachfront potential", "International surf community", "Growing nomad hub"],
+                coordinates=(6.8402, 81.8344),
+                elevation=5,
+                soil_type="Sandy coastal, drainage good",
+                water_access="Bore well, rainwater harvesting potential",
+                development_potential=9
+            ),
+            LandParcel(
+                location="Kandy Hills - Peradeniya",
+                district="Kandy",
+                province="Central",
+                area_acres=3.2,
+                price_per_acre=28000,
+                total_price=89600,
+                proximity_to_attractions=["Kandy City", "Botanical Gardens", "Temple of Tooth", "University"],
+                accessibility="A1 Highway, city bus routes",
+                zoning="Residential/Commercial Mixed",
+                utilities=["Full utilities", "High-speed internet", "Gas supply"],
+                strategic_advantages=["Cultural capital proximity", "University town", "Established luxury market", "Year-round tourism"],
+                coordinates=(7.2496, 80.5906),
+                elevation=465,
+                soil_type="Hill country, terraced potential",
+                water_access="Municipal supply, natural streams",
+                development_potential=8
+            ),
+            LandParcel(
+                location="Galle Fort Vicinity",
+                district="Galle",
+                province="Southern",
+                area_acres=1.0,
+                price_per_acre=45000,
+                total_price=45000,
+                proximity_to_attractions=["Galle Fort", "Unawatuna Beach", "Jungle Beach", "Cricket Stadium"],
+                accessibility="Southern Expressway, A2 coastal road",
+                zoning="Heritage Tourism Zone",
+                utilities=["Full utilities", "High-speed fiber", "Premium services"],
+                strategic_advantages=["UNESCO heritage", "Boutique hotel market", "International connectivity", "Established luxury tourism"],
+                coordinates=(6.0329, 80.2168),
+                elevation=15,
+                soil_type="Coastal red earth",
+                water_access="Municipal supply, well backup",
+                development_potential=10
+            ),
+            LandParcel(
+                location="Trincomalee - Uppuveli Beach",
+                district="Trincomalee",
+                province="Eastern",
+                area_acres=4.5,
+                price_per_acre=8000,
+                total_price=36000,
+                proximity_to_attractions=["Uppuveli Beach", "Koneswaram Temple", "Whale watching", "Hot Wells"],
+                accessibility="A6 Highway, coastal access",
+                zoning="Coastal Development Zone",
+                utilities=["Electricity expanding", "Bore well", "Mobile coverage"],
+                strategic_advantages=["Pristine beaches", "Emerging destination", "Low competition", "Whale watching hub", "Cultural diversity"],
+                coordinates=(8.5874, 81.2152),
+                elevation=10,
+                soil_type="Sandy loam, coastal",
+                water_access="Bore well, rainwater potential",
+                development_potential=7
+            )
+        ]
+        
+        for parcel in sample_lands:
+            parcel_id = self.land_db.insert_land_parcel(parcel)
+            print(f"✅ Added land parcel: {parcel.location} (ID: {parcel_id})")
+        
+        print(f"📊 Initialized {len(sample_lands)} sample land parcels")
+    
+    def query_ollama(self, prompt: str, max_tokens: int = 2000, use_cache: Optional[bool] = None,
+                     model: Optional[str] = None, cache_ttl: Optional[int] = None) -> str:
+        """
+        Query Ollama local AI with a given prompt.
+        Successful responses are cached on disk, so repeated prompts skip the model.
+        By default only deterministic (temperature 0) calls use the cache; pass
+        use_cache=True to accept a cached sample anyway, or False to always generate.
+        cache_ttl overrides the cache's default maximum age in seconds.
+        Pass model to override the agent's default model for this call.
+        Raises OllamaError if the generation fails; errors are never cached.
+        Raises QuotaExceeded once the daily request budget is spent.
+        """
+        model = model or self.ollama_model
+        use_cache = self._should_cache(use_cache)
+        cache_key = ResponseCache.make_key(prompt, model, max_tokens, self.temperature)
+        if use_cache:
+            cached = self._get_cached_response(cache_key, cache_ttl)
+            if cached is not None:
+                return cached
+        
+        try:
+            # Stream the generation and assemble it as it arrives instead of
+            # waiting for Ollama to buffer the whole response
+            buffer = io.StringIO()
+            for piece in self._generate_stream(prompt, max_tokens, model):
+                buffer.write(piece)
+            text = buffer.getvalue()
+            if not text:
+                return 'No response generated'
+            if use_cache:
+                self._store_response(cache_key, text)
+            return text
+                
+        except (OllamaError, requests.RequestException, ValueError) as e:
+            self.logger.error(f"Error querying Ollama: {str(e)}")
+            if isinstance(e, OllamaError):
+                raise
+            raise OllamaError(str(e)) from e
+
+    def stream_ollama(self, prompt: str, max_tokens: int = 2000, use_cache: Optional[bool] = None,
+                      model: Optional[str] = None, cache_ttl: Optional[int] = None) -> Iterator[str]:
+        """
+        Query Ollama and yield the response text chunk by chunk as it is generated.
+        The complete response is cached like query_ollama once the stream finishes.
+        Raises OllamaError if the generation fails part way.
+        """
+        model = model or self.ollama_model
+        use_cache = self._should_cache(use_cache)
+        cache_key = ResponseCache.make_key(prompt, model, max_tokens, self.temperature)
+        if use_cache:
+            cached = self._get_cached_response(cache_key, cache_ttl)
+            if cached is not None:
+                yield cached
+                return
+        
+        try:
+            buffer = io.StringIO()
+            for piece in self._generate_stream(prompt, max_tokens, model):
+                buffer.write(piece)
+                yield piece
+            
+            # An empty generation is not worth replaying; query_ollama never caches it either
+            text = buffer.getvalue()
+            if use_cache and text:
+                self._store_response(cache_key, text)
+                
+        except (OllamaError, requests.RequestException, ValueError) as e:
+            self.logger.error(f"Error streaming from Ollama: {str(e)}")
+            if isinstance(e, OllamaError):
+                raise
+            raise OllamaError(str(e)) from e
+
+    def _generate_stream(self, prompt: str, max_tokens: int, model: str) -> Iterator[str]:
+        """Yield the pieces of a streamed /api/generate call; raises if Ollama reports an error"""
+        # Only reached on a cache miss, so cache hits never count against the rate limit
+        quota = self.rate_limiter.wait_if_needed()
+        self.logger.debug(f"Remaining quota: {quota['minute_remaining']}/min, {quota['daily_remaining']}/day")
+        with self._post_generate(self._generate_payload(prompt, max_tokens, model, stream=True),
+                                 stream=True) as response:
+            if response.status_code != 200:
+                raise OllamaError(f"{response.status_code} - {response.text}")
+            
+            # Ollama streams one JSON object per line until "done" is set
+            done = False
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = self._parse_json(line)
+                if "error" in chunk:
+                    raise OllamaError(chunk['error'])
+                piece = chunk.get('response', '')
+                if piece:
+                    yield piece
+                if chunk.get('done'):
+                    self._record_token_usage(chunk)
+                    done = True
+                    break
+            # A stream cut off before "done" is a truncated answer: never return or cache it
+            if not done:
+                raise OllamaError("stream ended before done")
+
+    def _record_token_usage(self, final_chunk: Dict):
+        """Add the token counts Ollama reports on a generation's final chunk"""
+        with self._usage_lock:
+            self.token_usage["requests"] += 1
+            self.token_usage["prompt_tokens"] += final_chunk.get('prompt_eval_count', 0)
+            self.token_usage["completion_tokens"] += final_chunk.get('eval_count', 0)
+
+    def _post_generate(self, payload: Dict, stream: bool = False) -> requests.Response:
+        """
+        POST to /api/generate, retrying 429/503 responses a bounded number of times.
+        Waits for the server's Retry-After (capped, plus jitter) or an exponential
+        backoff when it sends none; the last response is returned either way.
+        """
+        for attempt in range(self._MAX_RETRIES + 1):
+            response = self.session.post(
+                f"{self.ollama_base_url}/api/generate",
+                json=payload,
+                timeout=120,  # Longer timeout for local processing
+                stream=stream
+            )
+            if response.status_code == 429:
+                # Slow every caller down, not just this retry loop
+                self.rate_limiter.penalize()
+            if response.status_code not in (429, 503) or attempt == self._MAX_RETRIES:
+                return response
+            
+            try:
+                delay = float(response.headers.get("Retry-After", ""))
+            except ValueError:
+                delay = 0.5 * 2 ** attempt
+            delay = min(delay, self._MAX_RETRY_AFTER) + random.uniform(0, 0.25)
+            response.close()
+            self.logger.warning(f"Ollama returned {response.status_code}, retrying in {delay:.1f}s "
+                                f"(attempt {attempt + 1}/{self._MAX_RETRIES})")
+            time.sleep(delay)
+        return response
+
+    @staticmethod
+    def _parse_json(raw: bytes) -> Dict:
+        """Decode an Ollama JSON body, with orjson when it is installed"""
+        return orjson.loads(raw) if ORJSON_AVAILABLE else json.loads(raw)
+
+    def _should_cache(self, use_cache: Optional[bool]) -> bool:
+        """Resolve the use_cache argument: sampled (temperature > 0) output is only cached on request"""
+        return self.temperature == 0 if use_cache is None else use_cache
+
+    def _get_cached_response(self, cache_key: str, ttl_seconds: Optional[int] = None) -> Optional[str]:
+        """Look up a response in the per-run memo first, then in the on-disk cache"""
+        # The memo honours the same TTL as the disk cache, so a per-call cache_ttl
+        # still applies on a long-lived agent
+        entry = self._run_cache.get(cache_key)
+        if entry is not None and not self.response_cache.is_expired(entry[1], ttl_seconds):
+            return entry[0]
+        
+        try:
+            entry = self.response_cache.get_entry(cache_key, ttl_seconds)
+        except sqlite3.Error as e:
+            # An unreadable cache only costs a fresh generation
+            self.logger.warning(f"Response cache read failed, treating as a miss: {e}")
+            return None
+        if entry is None:
+            return None
+        self._remember(cache_key, entry)
+        return entry[0]
+
+    def _remember(self, cache_key: str, entry: Tuple[str, float]):
+        """Add an entry to the in-memory memo, starting over once it is full"""
+        if len(self._run_cache) >= self._RUN_CACHE_MAX_ENTRIES:
+            self._run_cache.clear()
+        self._run_cache[cache_key] = entry
+
+    def _store_response(self, cache_key: str, text: str):
+        """Remember a successful response for this run and on disk"""
+        self._remember(cache_key, (text, time.time()))
+        try:
+            self.response_cache.set(cache_key, text)
+        except sqlite3.Error as e:
+            # The response itself is fine; losing the disk copy must not fail the analysis
+            self.logger.warning(f"Response cache write failed, not cached on disk: {e}")
+
+    def _generate_payload(self, prompt: str, max_tokens: int, model: str, stream: bool) -> Dict:
+        """Build the request body for Ollama's /api/generate endpoint"""
+        return {
+            "model": model,
+            "prompt": prompt,
+            "stream": stream,
+            "options": {
+                "num_ctx": self.num_ctx,
+                "temperature": self.temperature,
+                "num_predict": max_tokens
+            }
+        }
+
+    def close(self):
+        """Release pooled HTTP connections"""
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @staticmethod
+    def _progress_line(name: str, outcome: Dict) -> bytes:
+        """Encode one finished job as a JSON line for the progress file"""
+        if ORJSON_AVAILABLE:
+            return orjson.dumps(
+                {name: outcome},
+                default=str,
+                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_APPEND_NEWLINE
+            )
+        return (json.dumps({name: outcome}, ensure_ascii=False, default=str) + "\n").encode('utf-8')
+
+    def run_parallel(self, jobs: Dict[str, Callable[[], Dict]], progress_path: Optional[str] = None) -> Dict[str, Dict]:
+        """
+        Run independent analysis calls concurrently so their Ollama waits overlap.
+        Returns the results keyed like the given jobs, in the same order.
+        If progress_path is given, each result is also appended there as a JSON line as soon as it completes.
+        If a job raises, jobs that have not started yet are cancelled and the exception propagates.
+        """
+        if not jobs:
+            return {}
+        
+        # Opened before any job is submitted, so a bad path fails without orphaning jobs
+        progress = open(progress_path, 'wb') if progress_path else None
+        # A pool sized to the concurrency limit bounds the in-flight requests by itself,
+        # and never starts more threads than there are jobs
+        executor = ThreadPoolExecutor(max_workers=max(1, min(len(jobs), self.max_concurrent_requests)))
+        futures = {executor.submit(job): name for name, job in jobs.items()}
+        outcomes = {}
+        try:
+            for future in as_completed(futures):
+                name = futures[future]
+                outcomes[name] = future.result()
+                if progress is not None:
+                    # Append each finished report while the others are still running
+                    progress.write(self._progress_line(name, outcomes[name]))
+                    progress.flush()
+        finally:
+            # After a failure, don't let queued jobs keep calling Ollama
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=True)
+            if progress is not None:
+                progress.close()
+        return {name: outcomes[name] for name in jobs}
+
+    def _analysis_outcome(self, prompt: str, **query_kwargs) -> Dict:
+        """Query Ollama for an analysis; a failure becomes an "error" entry next to empty data"""
+        try:
+            return {"data": self.query_ollama(prompt, **query_kwargs)}
+        except OllamaError as e:
+            return {"data": "", "error": str(e)}
+
+    def analyze_land_with_rag(self, location: str, investment_budget: float = None, timestamp: Optional[str] = None) -> Dict:
+        """
+        Analyze land potential using RAG-enhanced context
+        """
+        # Get relevant context from RAG system
+        query = f"real estate investment opportunities strategic location {location} Sri Lanka tourism development"
+        context = self.rag_system.get_context_for_query(query)
+        
+        # Search for matching land parcels in database
+        parcels = self.land_db.search_parcels({"district": location.split()[0]}) if " " in location else []
+        if not parcels:
+            # Search by location name
+            all_parcels = self.land_db.get_all_parcels()
+            parcels = [p for p in all_parcels if location.lower() in p.location.lower()]
+        
+        parcel_lines = []
+        if parcels:
+            parcel_lines.append(f"\n\nAvailable Land Parcels in {location}:\n")
+            for i, parcel in enumerate(parcels[:3], 1):
+                parcel_lines.append(f"{i}. {parcel.location}: {parcel.area_acres} acres at ${parcel.price_per_acre:,}/acre (Total: ${parcel.total_price:,})\n")
+                parcel_lines.append(f"   Strategic advantages: {', '.join(parcel.strategic_advantages[:3])}\n")
+                parcel_lines.append(f"   Development potential: {parcel.development_potential}/10\n")
+        parcel_info = "".join(parcel_lines)
+        
+        budget_info = f"\nInvestment Budget: ${investment_budget:,}" if investment_budget else ""
+        
+        prompt = self._LAND_ANALYSIS_PROMPT.format(
+            location=location,
+            context=context,
+            parcel_info=parcel_info,
+            budget_info=budget_info
+        )
+        
+        outcome = self._analysis_outcome(prompt, max_tokens=1200, use_cache=True)
+        
+        return {
+            "location": location,
+            "timestamp": timestamp or datetime.now().isoformat(),
+            "analysis_type": "rag_enhanced_land_analysis",
+            "available_parcels": len(parcels),
+            "context_used": len(context) > 100,
+            "investment_budget": investment_budget,
+            **outcome
+        }
     
-    def find_strategic_lands(self, criteria: Dict) -> Dict:
+    def find_strategic_lands(self, criteria: Dict, timestamp: Optional[str] = None) -> Dict:
         """
         Find strategic lands based on specific criteria using RAG and database
         """
@@ -778,74 +1372,35 @@ class SriLankaRealEstateRAGAgent:
         matching_parcels = self.land_db.search_parcels(db_filters)
         
         # Prepare parcel information
-        parcel_details = ""
+        detail_lines = []
         if matching_parcels:
-            parcel_details = f"\n\nMATCHING LAND PARCELS ({len(matching_parcels)} found):\n"
+            detail_lines.append(f"\n\nMATCHING LAND PARCELS ({len(matching_parcels)} found):\n")
             for i, parcel in enumerate(matching_parcels[:5], 1):
-                parcel_details += f"\n{i}. {parcel.location} ({parcel.district})\n"
-                parcel_details += f"   • Area: {parcel.area_acres} acres | Price: ${parcel.total_price:,} (${parcel.price_per_acre:,}/acre)\n"
-                parcel_details += f"   • Strategic advantages: {', '.join(parcel.strategic_advantages)}\n"
-                parcel_details += f"   • Proximity: {', '.join(parcel.proximity_to_attractions[:3])}\n"
-                parcel_details += f"   • Development potential: {parcel.development_potential}/10\n"
-                parcel_details += f"   • Accessibility: {parcel.accessibility}\n"
+                detail_lines.append(f"\n{i}. {parcel.location} ({parcel.district})\n")
+                detail_lines.append(f"   • Area: {parcel.area_acres} acres | Price: ${parcel.total_price:,} (${parcel.price_per_acre:,}/acre)\n")
+                detail_lines.append(f"   • Strategic advantages: {', '.join(parcel.strategic_advantages)}\n")
+                detail_lines.append(f"   • Proximity: {', '.join(parcel.proximity_to_attractions[:3])}\n")
+                detail_lines.append(f"   • Development potential: {parcel.development_potential}/10\n")
+                detail_lines.append(f"   • Accessibility: {parcel.accessibility}\n")
+        parcel_details = "".join(detail_lines)
         
         criteria_text = json.dumps(criteria, indent=2)
         
-        prompt = f"""
-        As a Sri Lanka real estate investment expert, find and recommend the most strategic lands based on these criteria:
-
-        INVESTMENT CRITERIA:
-        {criteria_text}
-
-        RELEVANT MARKET CONTEXT:
-        {context}
-
-        AVAILABLE LAND OPTIONS:
-        {parcel_details}
-
-        Please provide:
-
-        1. TOP STRATEGIC LAND RECOMMENDATIONS:
-           - Rank the best 3-5 options from the available parcels
-           - Explain why each location is strategically advantageous
-           - Match criteria to land characteristics
-
-        2. STRATEGIC LOCATION ANALYSIS:
-           - Tourism potential and visitor flow
-           - Infrastructure and accessibility
-           - Competition and market positioning
-           - Government development plans
-
-        3. INVESTMENT VIABILITY:
-           - Cost-benefit analysis for each recommended parcel
-           - ROI projections and timeline
-           - Risk assessment and mitigation
-           - Financing and legal considerations
-
-        4. DEVELOPMENT STRATEGY:
-           - Optimal development approach for each parcel
-           - Target market and positioning
-           - Phased development recommendations
-           - Partnership and operational strategies
-
-        5. MARKET TIMING:
-           - Current market conditions
-           - Optimal timing for acquisition and development
-           - Seasonal considerations
-           - Economic and tourism trends
-
-        Focus on actionable recommendations with specific reasoning for why each location offers strategic advantages for the intended investment type.
-        """
+        prompt = self._STRATEGIC_SEARCH_PROMPT.format(
+            criteria_text=criteria_text,
+            context=context,
+            parcel_details=parcel_details
+        )
         
-        response = self.query_ollama(prompt)
+        outcome = self._analysis_outcome(prompt, max_tokens=1500, use_cache=True)
         
         return {
             "criteria": criteria,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": timestamp or datetime.now().isoformat(),
             "analysis_type": "strategic_land_search",
             "matching_parcels_count": len(matching_parcels),
             "context_sources": len(context) > 100,
-            "data": response,
+            **outcome,
             "raw_parcels": [
                 {
                     "location": p.location,
@@ -858,7 +1413,7 @@ class SriLankaRealEstateRAGAgent:
             ]
         }
     
-    def comparative_land_analysis(self, locations: List[str]) -> Dict:
+    def comparative_land_analysis(self, locations: List[str], timestamp: Optional[str] = None) -> Dict:
         """
         Compare multiple locations using RAG-enhanced analysis
         """
@@ -868,85 +1423,45 @@ class SriLankaRealEstateRAGAgent:
         
         # Get land parcels for each location
         location_parcels = {}
+        all_parcels = self.land_db.get_all_parcels()
         for location in locations:
-            all_parcels = self.land_db.get_all_parcels()
             parcels = [p for p in all_parcels if location.lower() in p.location.lower()]
             location_parcels[location] = parcels
         
         # Prepare comparison data
-        comparison_data = f"\n\nLAND PARCEL DATA FOR COMPARISON:\n"
+        comparison_lines = ["\n\nLAND PARCEL DATA FOR COMPARISON:\n"]
         for location, parcels in location_parcels.items():
-            comparison_data += f"\n{location.upper()}:\n"
+            comparison_lines.append(f"\n{location.upper()}:\n")
             if parcels:
                 avg_price = sum(p.price_per_acre for p in parcels) / len(parcels)
                 avg_potential = sum(p.development_potential for p in parcels) / len(parcels)
-                comparison_data += f"  • Available parcels: {len(parcels)}\n"
-                comparison_data += f"  • Average price per acre: ${avg_price:,.0f}\n"
-                comparison_data += f"  • Average development potential: {avg_potential:.1f}/10\n"
-                comparison_data += f"  • Best parcel: {parcels[0].location} - {parcels[0].area_acres} acres at ${parcels[0].total_price:,}\n"
+                comparison_lines.append(f"  • Available parcels: {len(parcels)}\n")
+                comparison_lines.append(f"  • Average price per acre: ${avg_price:,.0f}\n")
+                comparison_lines.append(f"  • Average development potential: {avg_potential:.1f}/10\n")
+                comparison_lines.append(f"  • Best parcel: {parcels[0].location} - {parcels[0].area_acres} acres at ${parcels[0].total_price:,}\n")
             else:
-                comparison_data += f"  • No specific parcels in database\n"
+                comparison_lines.append("  • No specific parcels in database\n")
+        comparison_data = "".join(comparison_lines)
         
-        prompt = f"""
-        Compare these Sri Lankan locations for strategic real estate investment: {locations_str}
-
-        MARKET INTELLIGENCE:
-        {context}
-
-        LAND AVAILABILITY DATA:
-        {comparison_data}
-
-        Provide a comprehensive comparative analysis:
-
-        1. STRATEGIC POSITIONING COMPARISON:
-           - Rank locations by strategic importance (1st, 2nd, 3rd...)
-           - Tourism appeal and market positioning
-           - Infrastructure and accessibility comparison
-           - Unique selling propositions for each
-
-        2. INVESTMENT METRICS COMPARISON:
-           Location | Investment Score | Price Range | ROI Potential | Risk Level
-           [Create a comparison table]
-
-        3. MARKET OPPORTUNITIES:
-           - Best market segments for each location
-           - Competition levels and market saturation
-           - Growth potential and development pipeline
-           - Seasonal performance variations
-
-        4. DEVELOPMENT RECOMMENDATIONS:
-           - Optimal property types for each location
-           - Investment scale recommendations
-           - Timeline for development
-           - Target market positioning
-
-        5. FINAL RECOMMENDATION:
-           - Top choice with detailed justification
-           - Second choice with conditions
-           - Locations to avoid and reasons
-           - Portfolio approach recommendations
-
-        6. RISK ASSESSMENT:
-           - Political and economic risks by location
-           - Market risks and mitigation strategies
-           - Operational challenges specific to each area
-           - Long-term sustainability factors
-
-        Conclude with specific actionable recommendations for investors considering these locations.
-        """
+        prompt = self._COMPARISON_PROMPT.format(
+            locations_str=locations_str,
+            context=context,
+            comparison_data=comparison_data
+        )
         
-        response = self.query_ollama(prompt)
+        # Competition and positioning move faster than the rest, so refresh daily
+        outcome = self._analysis_outcome(prompt, max_tokens=1500, use_cache=True, cache_ttl=86400)
         
         return {
             "locations": locations,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": timestamp or datetime.now().isoformat(),
             "analysis_type": "comparative_land_analysis",
             "parcels_data": location_parcels,
             "context_enhanced": len(context) > 100,
-            "data": response
+            **outcome
         }
     
-    def generate_investment_report(self, investment_profile: Dict) -> Dict:
+    def generate_investment_report(self, investment_profile: Dict, timestamp: Optional[str] = None) -> Dict:
         """
         Generate comprehensive investment report using RAG and data
         """
@@ -965,105 +1480,51 @@ class SriLankaRealEstateRAGAgent:
         })
         
         # Prepare investment options
-        investment_options = ""
+        option_lines = []
         if suitable_parcels:
-            investment_options = f"\n\nSUITABLE INVESTMENT OPTIONS (within 80% of budget):\n"
+            option_lines.append("\n\nSUITABLE INVESTMENT OPTIONS (within 80% of budget):\n")
             for i, parcel in enumerate(suitable_parcels[:5], 1):
                 remaining_budget = budget - parcel.total_price
-                investment_options += f"\n{i}. {parcel.location}\n"
-                investment_options += f"   • Land cost: ${parcel.total_price:,} ({parcel.area_acres} acres)\n"
-                investment_options += f"   • Remaining budget for development: ${remaining_budget:,}\n"
-                investment_options += f"   • Strategic advantages: {', '.join(parcel.strategic_advantages[:2])}\n"
-                investment_options += f"   • Development potential: {parcel.development_potential}/10\n"
+                option_lines.append(f"\n{i}. {parcel.location}\n")
+                option_lines.append(f"   • Land cost: ${parcel.total_price:,} ({parcel.area_acres} acres)\n")
+                option_lines.append(f"   • Remaining budget for development: ${remaining_budget:,}\n")
+                option_lines.append(f"   • Strategic advantages: {', '.join(parcel.strategic_advantages[:2])}\n")
+                option_lines.append(f"   • Development potential: {parcel.development_potential}/10\n")
+        investment_options = "".join(option_lines)
         
         profile_text = json.dumps(investment_profile, indent=2)
         
-        prompt = f"""
-        Generate a comprehensive real estate investment report for Sri Lanka based on this investment profile:
-
-        INVESTOR PROFILE:
-        {profile_text}
-
-        MARKET INTELLIGENCE:
-        {context}
-
-        AVAILABLE INVESTMENT OPTIONS:
-        {investment_options}
-
-        Create a detailed investment report with:
-
-        1. EXECUTIVE SUMMARY:
-           - Investment recommendation overview
-           - Key opportunities identified
-           - Expected returns and timeline
-           - Risk assessment summary
-
-        2. MARKET ANALYSIS:
-           - Sri Lanka tourism market trends
-           - Real estate market conditions
-           - Target segment analysis
-           - Competitive landscape
-
-        3. STRATEGIC LAND RECOMMENDATIONS:
-           - Top 3 recommended parcels with justification
-           - Strategic advantages of each location
-           - Development potential analysis
-           - Risk-return profile for each
-
-        4. FINANCIAL PROJECTIONS:
-           - Initial investment breakdown
-           - Development cost estimates
-           - Revenue projections (Year 1-5)
-           - ROI calculations and break-even analysis
-           - Sensitivity analysis for key variables
-
-        5. DEVELOPMENT STRATEGY:
-           - Recommended property type and scale
-           - Phased development approach
-           - Design and amenity recommendations
-           - Operational strategy
-
-        6. LEGAL AND REGULATORY:
-           - Legal structure for foreign investment
-           - Required approvals and licenses
-           - Tax implications and incentives
-           - Compliance requirements
-
-        7. RISK MANAGEMENT:
-           - Identified risks and mitigation strategies
-           - Insurance requirements
-           - Exit strategy options
-           - Portfolio diversification recommendations
-
-        8. IMPLEMENTATION ROADMAP:
-           - 12-month action plan
-           - Key milestones and timelines
-           - Required partnerships
-           - Success metrics and monitoring
-
-        Make recommendations specific, actionable, and backed by data. Include specific numbers for costs, returns, and timelines.
-        """
+        prompt = self._INVESTMENT_REPORT_PROMPT.format(
+            profile_text=profile_text,
+            context=context,
+            investment_options=investment_options
+        )
         
-        response = self.query_ollama(prompt)
+        outcome = self._analysis_outcome(prompt, max_tokens=2000, use_cache=True)
         
         return {
             "investment_profile": investment_profile,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": timestamp or datetime.now().isoformat(),
             "analysis_type": "comprehensive_investment_report",
             "suitable_parcels_found": len(suitable_parcels),
             "budget_range": f"${budget:,}",
-            "data": response
+            **outcome
         }
     
-    def run_comprehensive_rag_analysis(self, focus_areas: List[str] = None, budget_range: Tuple[float, float] = None) -> Dict:
+    def run_comprehensive_rag_analysis(self, focus_areas: List[str] = None, budget_range: Tuple[float, float] = None,
+                                       progress_path: Optional[str] = None) -> Dict:
         """
-        Run comprehensive RAG-enhanced analysis
+        Run comprehensive RAG-enhanced analysis.
+        Pass progress_path to stream each finished report to a JSON-lines file during the run.
         """
-        focus_areas = focus_areas or ["Ella", "Sigiriya", "Arugam Bay", "Kandy", "Galle"]
+        focus_areas = focus_areas or list(self.DEFAULT_FOCUS_AREAS)
+        self._run_cache.clear()
         self.logger.info(f"Starting comprehensive RAG analysis for {len(focus_areas)} focus areas...")
         
+        # One timestamp for the whole pass so every report in it agrees
+        run_timestamp = datetime.now().isoformat()
         results = {
-            "analysis_timestamp": datetime.now().isoformat(),
+            "analysis_timestamp": run_timestamp,
             "focus_areas": focus_areas,
             "budget_range": budget_range,
             "reports": {},
@@ -1071,33 +1532,28 @@ class SriLankaRealEstateRAGAgent:
         }
         
         try:
+            # All reports below are independent of each other, so they are
+            # dispatched together and their Ollama calls overlap
+            jobs = {}
+
             # 1. Strategic land search for each focus area
-            self.logger.info("1. Analyzing strategic lands by area...")
-            results["reports"]["area_analyses"] = {}
-            
+            budget = budget_range[1] if budget_range else None
             for area in focus_areas:
-                budget = budget_range[1] if budget_range else None
-                analysis = self.analyze_land_with_rag(area, budget)
-                results["reports"]["area_analyses"][area] = analysis
-                self.logger.info(f"✅ Completed analysis for {area}")
-            
+                jobs[f"area:{area}"] = lambda area=area: self.analyze_land_with_rag(area, budget, timestamp=run_timestamp)
+
             # 2. Comparative analysis
-            self.logger.info("2. Running comparative analysis...")
-            results["reports"]["comparative_analysis"] = self.comparative_land_analysis(focus_areas)
-            
+            jobs["comparative_analysis"] = lambda: self.comparative_land_analysis(focus_areas, timestamp=run_timestamp)
+
             # 3. Strategic land search with criteria
-            self.logger.info("3. Finding strategic lands with optimal criteria...")
             search_criteria = {
                 "investment_type": "tourism_accommodation",
                 "target_tourism": "sustainable eco-tourism",
                 "min_development_potential": 7,
                 "max_budget": budget_range[1] if budget_range else 200000
             }
-            results["reports"]["strategic_search"] = self.find_strategic_lands(search_criteria)
-            
+            jobs["strategic_search"] = lambda: self.find_strategic_lands(search_criteria, timestamp=run_timestamp)
+
             # 4. Investment report for different profiles
-            self.logger.info("4. Generating investment reports for different profiles...")
-            
             investment_profiles = [
                 {
                     "profile_name": "Budget Eco-Lodge",
@@ -1113,11 +1569,27 @@ class SriLankaRealEstateRAGAgent:
                 }
             ]
             
+            for profile in investment_profiles:
+                jobs[f"profile:{profile['profile_name']}"] = lambda profile=profile: self.generate_investment_report(profile, timestamp=run_timestamp)
+
+            self.logger.info(f"Running {len(jobs)} reports concurrently...")
+            completed = self.run_parallel(jobs, progress_path)
+
+            results["reports"]["area_analyses"] = {}
+            for area in focus_areas:
+                results["reports"]["area_analyses"][area] = completed[f"area:{area}"]
+                if "error" in completed[f"area:{area}"]:
+                    self.logger.warning(f"❌ Analysis for {area} failed: {completed[f'area:{area}']['error']}")
+                else:
+                    self.logger.info(f"✅ Completed analysis for {area}")
+
+            results["reports"]["comparative_analysis"] = completed["comparative_analysis"]
+            results["reports"]["strategic_search"] = completed["strategic_search"]
+
             results["reports"]["investment_profiles"] = {}
             for profile in investment_profiles:
-                report = self.generate_investment_report(profile)
-                results["reports"]["investment_profiles"][profile["profile_name"]] = report
-            
+                results["reports"]["investment_profiles"][profile["profile_name"]] = completed[f"profile:{profile['profile_name']}"]
+
             # 5. Generate summary metrics
             all_parcels = self.land_db.get_all_parcels()
             results["summary_metrics"] = {
@@ -1131,151 +1603,327 @@ class SriLankaRealEstateRAGAgent:
                 }
             }
             
-            self.logger.info("✅ Comprehensive RAG analysis completed successfully!")
+            failed_reports, total_reports = count_failed_reports(results)
+            if failed_reports:
+                self.logger.warning(f"⚠️  Comprehensive RAG analysis finished with {failed_reports} of {total_reports} reports failed")
+            else:
+                self.logger.info("✅ Comprehensive RAG analysis completed successfully!")
             
+        except QuotaExceeded:
+            # Out of quota is not an analysis failure; let the caller decide what to do
+            raise
         except Exception as e:
             self.logger.error(f"Error during comprehensive analysis: {str(e)}")
             results["error"] = str(e)
         
         return results
     
-    def export_rag_analysis(self, results: Dict, base_filename: str = None) -> Dict[str, str]:
+    def export_rag_analysis(self, results: Dict, base_filename: str = None,
+                            formats: Tuple[str, ...] = ("txt", "json", "excel")) -> Dict[str, str]:
         """
-        Export RAG analysis results to multiple formats
+        Export RAG analysis results to multiple formats.
+        Add "parquet" to formats for a columnar copy of the report text (needs pandas and pyarrow),
+        or "hdf5" for one compressed store holding the report text and every sheet (needs pandas and tables).
         """
         if not base_filename:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             base_filename = f"sri_lanka_rag_real_estate_analysis_{timestamp}"
         
+        # Materialize the report text and sheet rows once, up front; the writers only write
+        sections = self._collect_report_sections(results)
+        
+        # The writers only do independent file I/O, so run them side by side
+        writers = {}
+        if "txt" in formats:
+            writers["txt"] = (self._save_txt_report, (results, sections, f"{base_filename}.txt"))
+        if "json" in formats:
+            writers["json"] = (self._save_json_report, (results, f"{base_filename}.json"))
+        if "excel" in formats or "hdf5" in formats:
+            try:
+                sheets = self._collect_excel_sheets(results)
+            except Exception as e:
+                self.logger.error(f"Error collecting report sheets: {e}")
+            else:
+                if "excel" in formats:
+                    writers["excel"] = (self._save_excel_report, (sheets, f"{base_filename}.xlsx"))
+                if "hdf5" in formats:
+                    writers["hdf5"] = (self._save_hdf5_report, (sections, sheets, f"{base_filename}.h5"))
+        if "parquet" in formats:
+            writers["parquet"] = (self._save_parquet_report, (sections, f"{base_filename}.parquet"))
+        
+        if not writers:
+            return {}
+        
+        with ThreadPoolExecutor(max_workers=len(writers)) as executor:
+            futures = {
+                format_type: executor.submit(writer, *args)
+                for format_type, (writer, args) in writers.items()
+            }
+        
         saved_files = {}
+        for format_type, future in futures.items():
+            filename = future.result()
+            if filename:
+                saved_files[format_type] = filename
         
-        # 1. Save detailed TXT report
-        try:
-            txt_filename = f"{base_filename}.txt"
-            with open(txt_filename, 'w', encoding='utf-8') as f:
-                f.write("=" * 80 + "\n")
-                f.write("SRI LANKA REAL ESTATE RAG-ENHANCED ANALYSIS REPORT\n")
-                f.write("=" * 80 + "\n\n")
-                
-                f.write(f"Report Generated: {results.get('analysis_timestamp', 'N/A')}\n")
-                f.write(f"Focus Areas: {', '.join(results.get('focus_areas', []))}\n")
-                f.write(f"Budget Range: ${results.get('budget_range', ['N/A'])[0]:,} - ${results.get('budget_range', ['N/A', 'N/A'])[1]:,}\n" if results.get('budget_range') else "Budget Range: Not specified\n")
-                f.write(f"Analysis Type: RAG-Enhanced with Local Knowledge Base\n\n")
+        return saved_files
+    
+    def _collect_report_sections(self, results: Dict) -> List[Tuple[str, List[Tuple[Optional[str], str]]]]:
+        """Return (report type, [(nested report key or None, text)]) for every report"""
+        sections = []
+        for report_type, report_data in results.get("reports", {}).items():
+            entries = []
+            if isinstance(report_data, dict):
+                if "data" in report_data:
+                    entries.append((None, self._report_text(report_data)))
                 
-                # Write summary metrics
-                if "summary_metrics" in results:
-                    f.write("SUMMARY METRICS\n")
-                    f.write("=" * 40 + "\n")
-                    metrics = results["summary_metrics"]
-                    f.write(f"Total Land Parcels Analyzed: {metrics.get('total_parcels_analyzed', 0)}\n")
-                    f.write(f"Average Price per Acre: ${metrics.get('average_price_per_acre', 0):,.0f}\n")
-                    f.write(f"Average Development Potential: {metrics.get('average_development_potential', 0):.1f}/10\n")
-                    f.write(f"Districts Covered: {', '.join(metrics.get('top_districts', []))}\n")
-                    price_range = metrics.get('price_range', {})
-                    f.write(f"Price Range: ${price_range.get('min_total', 0):,} - ${price_range.get('max_total', 0):,}\n\n")
+                # Handle nested reports (like area analyses)
+                for key, value in report_data.items():
+                    if key != "data" and isinstance(value, dict) and "data" in value:
+                        entries.append((key, self._report_text(value)))
+            sections.append((report_type, entries))
+        return sections
+    
+    @staticmethod
+    def _report_text(report: Dict) -> str:
+        """The report body, or its error when the analysis failed"""
+        if "error" in report:
+            return f"Error: {report['error']}"
+        return str(report["data"])
+    
+    @staticmethod
+    def _write_bytes(filename: str, payload: bytes):
+        """Write an already-encoded report straight to the file descriptor in one pass"""
+        data = memoryview(payload)
+        fd = os.open(filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o644)
+        try:
+            # Tell the kernel the file is written front to back so it can tune writeback
+            if hasattr(os, "posix_fadvise"):
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            while data:
+                written = os.write(fd, data)
+                data = data[written:]
+        finally:
+            os.close(fd)
+    
+    def _save_txt_report(self, results: Dict, sections: List[Tuple[str, List[Tuple[Optional[str], str]]]],
+                         txt_filename: str) -> Optional[str]:
+        """Save the detailed TXT report"""
+        try:
+            # Collect every fragment first and hand the file a single batch
+            parts = []
+            parts.append("=" * 80 + "\n")
+            parts.append("SRI LANKA REAL ESTATE RAG-ENHANCED ANALYSIS REPORT\n")
+            parts.append("=" * 80 + "\n\n")
+            
+            parts.append(f"Report Generated: {results.get('analysis_timestamp', 'N/A')}\n")
+            parts.append(f"Focus Areas: {', '.join(results.get('focus_areas', []))}\n")
+            parts.append(f"Budget Range: ${results.get('budget_range', ['N/A'])[0]:,} - ${results.get('budget_range', ['N/A', 'N/A'])[1]:,}\n" if results.get('budget_range') else "Budget Range: Not specified\n")
+            parts.append(f"Analysis Type: RAG-Enhanced with Local Knowledge Base\n\n")
+            
+            # Write summary metrics
+            if "summary_metrics" in results:
+                parts.append("SUMMARY METRICS\n")
+                parts.append("=" * 40 + "\n")
+                metrics = results["summary_metrics"]
+                parts.append(f"Total Land Parcels Analyzed: {metrics.get('total_parcels_analyzed', 0)}\n")
+                parts.append(f"Average Price per Acre: ${metrics.get('average_price_per_acre', 0):,.0f}\n")
+                parts.append(f"Average Development Potential: {metrics.get('average_development_potential', 0):.1f}/10\n")
+                parts.append(f"Districts Covered: {', '.join(metrics.get('top_districts', []))}\n")
+                price_range = metrics.get('price_range', {})
+                parts.append(f"Price Range: ${price_range.get('min_total', 0):,} - ${price_range.get('max_total', 0):,}\n\n")
+            
+            # Write each report section
+            for report_type, entries in sections:
+                parts.append("=" * 60 + "\n")
+                parts.append(f"{report_type.upper().replace('_', ' ')}\n")
+                parts.append("=" * 60 + "\n\n")
                 
-                # Write each report section
-                reports = results.get("reports", {})
-                for report_type, report_data in reports.items():
-                    f.write("=" * 60 + "\n")
-                    f.write(f"{report_type.upper().replace('_', ' ')}\n")
-                    f.write("=" * 60 + "\n\n")
-                    
-                    if isinstance(report_data, dict):
-                        if "data" in report_data:
-                            f.write(str(report_data["data"]))
-                            f.write("\n\n")
-                        
-                        # Handle nested reports (like area analyses)
-                        for key, value in report_data.items():
-                            if key != "data" and isinstance(value, dict) and "data" in value:
-                                f.write(f"\n--- {key.upper()} ---\n")
-                                f.write(str(value["data"]))
-                                f.write("\n\n")
-                    
-                    f.write("\n" + "-" * 40 + "\n\n")
+                for key, text in entries:
+                    if key is not None:
+                        parts.append(f"\n--- {key.upper()} ---\n")
+                    parts.append(text)
+                    parts.append("\n\n")
                 
-                f.write("=" * 80 + "\n")
-                f.write("END OF RAG-ENHANCED ANALYSIS REPORT\n")
-                f.write("=" * 80 + "\n")
+                parts.append("\n" + "-" * 40 + "\n\n")
+            
+            parts.append("=" * 80 + "\n")
+            parts.append("END OF RAG-ENHANCED ANALYSIS REPORT\n")
+            parts.append("=" * 80 + "\n")
+            
+            self._write_bytes(txt_filename, "".join(parts).encode("utf-8"))
             
-            saved_files["txt"] = txt_filename
             self.logger.info(f"TXT report saved: {txt_filename}")
+            return txt_filename
             
         except Exception as e:
             self.logger.error(f"Error saving TXT report: {e}")
-        
-        # 2. Save JSON with full data
+            return None
+    
+    def _save_json_report(self, results: Dict, json_filename: str) -> Optional[str]:
+        """Save the JSON report with full data"""
         try:
-            json_filename = f"{base_filename}.json"
-            with open(json_filename, 'w', encoding='utf-8') as f:
-                json.dump(results, f, indent=2, ensure_ascii=False, default=str)
+            if ORJSON_AVAILABLE:
+                # Dataclasses pass through to default=str to match the stdlib output
+                payload = orjson.dumps(
+                    results,
+                    default=str,
+                    option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATACLASS
+                )
+            else:
+                # json.dump would issue one write per encoder chunk; encode first, write once
+                payload = json.dumps(results, indent=2, ensure_ascii=False, default=str).encode("utf-8")
+            self._write_bytes(json_filename, payload)
             
-            saved_files["json"] = json_filename
             self.logger.info(f"JSON report saved: {json_filename}")
+            return json_filename
             
         except Exception as e:
             self.logger.error(f"Error saving JSON report: {e}")
-        
-        # 3. Save Excel with structured data
+            return None
+    
+    @staticmethod
+    def _report_text_frame(sections: List[Tuple[str, List[Tuple[Optional[str], str]]]]):
+        """Flatten the report sections into one (report_type, report_key, text) DataFrame"""
+        import pandas as pd
+        
+        records = [
+            (report_type, report_key, text)
+            for report_type, entries in sections
+            for report_key, text in entries
+        ]
+        return pd.DataFrame.from_records(records, columns=["report_type", "report_key", "text"])
+    
+    def _save_hdf5_report(self, sections: List[Tuple[str, List[Tuple[Optional[str], str]]]],
+                          sheets: List[Tuple[str, List[str], List[List]]], h5_filename: str) -> Optional[str]:
+        """Save the report text and every sheet as tables in one zstd-compressed HDF5 store"""
         try:
-            excel_filename = f"{base_filename}.xlsx"
-            with pd.ExcelWriter(excel_filename, engine='openpyxl') as writer:
-                # Summary sheet
-                summary_data = {
-                    "Metric": ["Analysis Date", "Focus Areas", "Total Reports", "Land Parcels", "Avg Price/Acre", "Avg Development Score"],
-                    "Value": [
-                        results.get("analysis_timestamp", ""),
-                        ", ".join(results.get("focus_areas", [])),
-                        len(results.get("reports", {})),
-                        results.get("summary_metrics", {}).get("total_parcels_analyzed", 0),
-                        f"${results.get('summary_metrics', {}).get('average_price_per_acre', 0):,.0f}",
-                        f"{results.get('summary_metrics', {}).get('average_development_potential', 0):.1f}/10"
-                    ]
-                }
-                pd.DataFrame(summary_data).to_excel(writer, sheet_name="Summary", index=False)
+            import pandas as pd
+            
+            with pd.HDFStore(h5_filename, mode='w', complib='blosc:zstd', complevel=5) as store:
+                reports = self._report_text_frame(sections).fillna({"report_key": ""})
+                store.put("reports", reports, format="table")
+                for sheet_name, header, rows in sheets:
+                    df = pd.DataFrame(rows, columns=header)
+                    # Table columns need a single type; the summary mixes numbers and text
+                    for column in df.columns[df.dtypes == object]:
+                        df[column] = df[column].astype(str)
+                    store.put(sheet_name.lower().replace(" ", "_"), df, format="table")
+            
+            self.logger.info(f"HDF5 report saved: {h5_filename}")
+            return h5_filename
+            
+        except Exception as e:
+            self.logger.error(f"Error saving HDF5 report: {e}")
+            return None
+    
+    def _save_parquet_report(self, sections: List[Tuple[str, List[Tuple[Optional[str], str]]]],
+                             parquet_filename: str) -> Optional[str]:
+        """Save the report text as one Parquet table of (report_type, report_key, text) rows"""
+        try:
+            df = self._report_text_frame(sections)
+            df.to_parquet(parquet_filename, compression="zstd", compression_level=3, index=False)
+            
+            self.logger.info(f"Parquet report saved: {parquet_filename}")
+            return parquet_filename
+            
+        except Exception as e:
+            self.logger.error(f"Error saving Parquet report: {e}")
+            return None
+    
+    def _collect_excel_sheets(self, results: Dict) -> List[Tuple[str, List[str], List[List]]]:
+        """Return (sheet name, header, rows) for every Excel sheet"""
+        # Summary sheet
+        sheets = [(
+            "Summary",
+            ["Metric", "Value"],
+            [
+                ["Analysis Date", results.get("analysis_timestamp", "")],
+                ["Focus Areas", ", ".join(results.get("focus_areas", []))],
+                ["Total Reports", len(results.get("reports", {}))],
+                ["Land Parcels", results.get("summary_metrics", {}).get("total_parcels_analyzed", 0)],
+                ["Avg Price/Acre", f"${results.get('summary_metrics', {}).get('average_price_per_acre', 0):,.0f}"],
+                ["Avg Development Score", f"{results.get('summary_metrics', {}).get('average_development_potential', 0):.1f}/10"]
+            ]
+        )]
+        
+        # Land parcels data if available
+        if "strategic_search" in results.get("reports", {}) and "raw_parcels" in results["reports"]["strategic_search"]:
+            parcels_data = []
+            for parcel in results["reports"]["strategic_search"]["raw_parcels"]:
+                parcels_data.append([
+                    parcel["location"],
+                    parcel["district"],
+                    parcel["area_acres"],
+                    parcel["total_price"],
+                    parcel["total_price"] / parcel["area_acres"],
+                    parcel["development_potential"],
+                    ", ".join(parcel["strategic_advantages"][:3])
+                ])
+            
+            if parcels_data:
+                sheets.append((
+                    "Land Parcels",
+                    ["Location", "District", "Area (Acres)", "Total Price", "Price per Acre",
+                     "Development Potential", "Strategic Advantages"],
+                    parcels_data
+                ))
+        
+        return sheets
+    
+    def _save_excel_report(self, sheets: List[Tuple[str, List[str], List[List]]], excel_filename: str) -> Optional[str]:
+        """Save the Excel workbook with structured data"""
+        try:
+            if XLSXWRITER_AVAILABLE:
+                # Rows are written in order, so the workbook can stream them to disk.
+                # LLM text stays literal: no auto-detected URLs or formulas
+                with xlsxwriter.Workbook(excel_filename, {
+                    'constant_memory': True,
+                    'strings_to_urls': False,
+                    'strings_to_formulas': False
+                }) as workbook:
+                    header_format = workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+                    for sheet_name, header, rows in sheets:
+                        worksheet = workbook.add_worksheet(sheet_name)
+                        worksheet.write_row(0, 0, header, header_format)
+                        for row_index, row in enumerate(rows, 1):
+                            worksheet.write_row(row_index, 0, row)
+            else:
+                # openpyxl's write-only mode is its streaming equivalent of constant_memory
+                from openpyxl import Workbook
+                from openpyxl.cell import WriteOnlyCell
+                from openpyxl.styles import Alignment, Border, Font, Side
                 
-                # Land parcels data if available
-                if "strategic_search" in results.get("reports", {}) and "raw_parcels" in results["reports"]["strategic_search"]:
-                    parcels_data = []
-                    for parcel in results["reports"]["strategic_search"]["raw_parcels"]:
-                        parcels_data.append({
-                            "Location": parcel["location"],
-                            "District": parcel["district"],
-                            "Area (Acres)": parcel["area_acres"],
-                            "Total Price": parcel["total_price"],
-                            "Price per Acre": parcel["total_price"] / parcel["area_acres"],
-                            "Development Potential": parcel["development_potential"],
-                            "Strategic Advantages": ", ".join(parcel["strategic_advantages"][:3])
-                        })
-                    
-                    if parcels_data:
-                        pd.DataFrame(parcels_data).to_excel(writer, sheet_name="Land Parcels", index=False)
+                workbook = Workbook(write_only=True)
+                thin = Side(style='thin')
+                for sheet_name, header, rows in sheets:
+                    worksheet = workbook.create_sheet(sheet_name)
+                    header_cells = []
+                    for title in header:
+                        cell = WriteOnlyCell(worksheet, value=title)
+                        cell.font = Font(bold=True)
+                        cell.border = Border(left=thin, right=thin, top=thin, bottom=thin)
+                        cell.alignment = Alignment(horizontal='center', vertical='top')
+                        header_cells.append(cell)
+                    worksheet.append(header_cells)
+                    for row in rows:
+                        worksheet.append(row)
+                workbook.save(excel_filename)
             
-            saved_files["excel"] = excel_filename
             self.logger.info(f"Excel report saved: {excel_filename}")
+            return excel_filename
             
         except Exception as e:
             self.logger.error(f"Error saving Excel report: {e}")
-        
-        return saved_files
+            return None
     
     def get_system_status(self) -> Dict:
         """Get comprehensive system status"""
-        land_count = len(self.land_db.get_all_parcels())
+        land_count = self.land_db.count_parcels()
         
         # Test RAG system
         rag_status = "operational" if self.rag_system.collection else "limited"
         
-        # Test Ollama connection
-        ollama_status = "connected"
-        try:
-            test_response = self.query_ollama("Test connection")
-            if "error" in test_response.lower():
-                ollama_status = "error"
-        except:
-            ollama_status = "disconnected"
-        
         return {
             "timestamp": datetime.now().isoformat(),
             "land_database": {
@@ -1288,9 +1936,10 @@ class SriLankaRealEstateRAGAgent:
                 "vector_db": "chromadb" if CHROMADB_AVAILABLE else "unavailable"
             },
             "ollama_ai": {
-                "status": ollama_status,
+                "status": self._probe_ollama_status(),
                 "model": self.ollama_model,
-                "base_url": self.ollama_base_url
+                "base_url": self.ollama_base_url,
+                "token_usage": dict(self.token_usage)
             },
             "dependencies": {
                 "sentence_transformers": SENTENCE_TRANSFORMERS_AVAILABLE,
@@ -1298,6 +1947,22 @@ class SriLankaRealEstateRAGAgent:
             }
         }
 
+def count_failed_reports(results: Dict) -> Tuple[int, int]:
+    """Return (failed, total) analysis reports in comprehensive analysis results"""
+    failed = total = 0
+    for report_data in results.get("reports", {}).values():
+        if not isinstance(report_data, dict):
+            continue
+        # Reports are either a single analysis or a mapping of analyses (per area, per profile)
+        reports = [report_data] if "data" in report_data else [
+            report for report in report_data.values() if isinstance(report, dict) and "data" in report
+        ]
+        for report in reports:
+            total += 1
+            if "error" in report:
+                failed += 1
+    return failed, total
+
 # Usage Example and Main Execution
 def main():
     """
@@ -1326,13 +1991,13 @@ def main():
         
         print("\n🚀 Starting comprehensive RAG-enhanced analysis...")
         
-        # Example 1: Analyze specific location with RAG
-        print("\n1. RAG-Enhanced Location Analysis...")
-        ella_analysis = agent.analyze_land_with_rag("Ella", investment_budget=75000)
-        print(f"✅ Ella analysis completed: {len(ella_analysis['data'])} characters")
+        focus_areas = ["Ella", "Kandy", "Arugam Bay", "Sigiriya"]
+        budget_range = (50000, 150000)
+        
+        # Examples 1-4 are independent, so their Ollama calls run concurrently
+        print("\n1-4. Running location analysis, strategic search, comparison and investment report...")
         
         # Example 2: Find strategic lands
-        print("\n2. Strategic Land Search...")
         strategic_criteria = {
             "investment_type": "eco_tourism_resort",
             "target_tourism": "sustainable adventure tourism",
@@ -1340,17 +2005,11 @@ def main():
             "max_budget": 100000,
             "location_preference": "mountain or coastal"
         }
-        strategic_lands = agent.find_strategic_lands(strategic_criteria)
-        print(f"✅ Strategic search completed: {strategic_lands['matching_parcels_count']} parcels found")
         
         # Example 3: Comparative analysis
-        print("\n3. Comparative Location Analysis...")
         comparison_locations = ["Ella", "Sigiriya", "Arugam Bay"]
-        comparison = agent.comparative_land_analysis(comparison_locations)
-        print(f"✅ Comparative analysis completed for {len(comparison_locations)} locations")
         
         # Example 4: Investment report generation
-        print("\n4. Investment Report Generation...")
         investment_profile = {
             "budget": 80000,
             "type": "boutique_eco_lodge",
@@ -1363,26 +2022,52 @@ def main():
             "target_market": "conscious travelers, digital nomads",
             "timeline": "12-18 months"
         }
-        investment_report = agent.generate_investment_report(investment_profile)
-        print(f"✅ Investment report generated for ${investment_profile['budget']:,} budget")
+        
+        examples = agent.run_parallel({
+            "ella_analysis": lambda: agent.analyze_land_with_rag("Ella", investment_budget=75000),
+            "strategic_lands": lambda: agent.find_strategic_lands(strategic_criteria),
+            "comparison": lambda: agent.comparative_land_analysis(comparison_locations),
+            "investment_report": lambda: agent.generate_investment_report(investment_profile)
+        })
+        
+        summaries = [
+            ("ella_analysis", f"Ella analysis completed: {len(examples['ella_analysis']['data'])} characters"),
+            ("strategic_lands", f"Strategic search completed: {examples['strategic_lands']['matching_parcels_count']} parcels found"),
+            ("comparison", f"Comparative analysis completed for {len(comparison_locations)} locations"),
+            ("investment_report", f"Investment report generated for ${investment_profile['budget']:,} budget")
+        ]
+        print()
+        for i, (name, summary) in enumerate(summaries, 1):
+            # Failed Ollama calls are recorded under "error" rather than mixed into the report text
+            if "error" in examples[name]:
+                print(f"{i}. ❌ {name.replace('_', ' ').capitalize()} failed: {examples[name]['error']}")
+            else:
+                print(f"{i}. ✅ {summary}")
         
         # Example 5: Comprehensive analysis
         print("\n5. Comprehensive RAG Analysis...")
-        focus_areas = ["Ella", "Kandy", "Arugam Bay", "Sigiriya"]
-        budget_range = (50000, 150000)
         
         comprehensive_results = agent.run_comprehensive_rag_analysis(focus_areas, budget_range)
         
         if "error" not in comprehensive_results:
-            print("✅ Comprehensive analysis completed!")
+            failed_reports, total_reports = count_failed_reports(comprehensive_results)
+            if total_reports and failed_reports == total_reports:
+                print(f"❌ Comprehensive analysis failed: all {total_reports} reports failed")
+                return None
+            if failed_reports:
+                # Failed sections are exported with their error text
+                print(f"⚠️  Comprehensive analysis partially completed: {failed_reports} of {total_reports} reports failed")
+            else:
+                print("✅ Comprehensive analysis completed!")
             
             # Export results
             print("\n6. Exporting Results...")
             saved_files = agent.export_rag_analysis(comprehensive_results)
             
-            print(f"\n📁 Analysis Results Exported:")
-            for format_type, filepath in saved_files.items():
-                print(f"   {format_type.upper()}: {filepath}")
+            # One write for the whole listing instead of a print per file
+            sys.stdout.write("\n📁 Analysis Results Exported:\n" + "".join(
+                f"   {format_type.upper()}: {filepath}\n" for format_type, filepath in saved_files.items()
+            ))
             
             # Display summary
             metrics = comprehensive_results.get("summary_metrics", {})
@@ -1397,6 +2082,10 @@ def main():
             print(f"❌ Comprehensive analysis failed: {comprehensive_results.get('error')}")
             return None
             
+    except QuotaExceeded as e:
+        print(f"❌ {e}")
+        print("💡 Cached responses don't count against the limit; new analyses have to wait until tomorrow")
+        return None
     except Exception as e:
         print(f"❌ Error running RAG analysis: {str(e)}")
         print("\nTroubleshooting:")
@@ -1420,9 +2109,12 @@ def setup_requirements():
         ],
         "Python Packages": [
             "requests",
-            "pandas", 
-            "numpy",
-            "openpyxl",
+            "xlsxwriter (Excel export)",
+            "openpyxl (optional, Excel export without xlsxwriter)",
+            "orjson (optional, faster JSON export)",
+            "pandas (optional, Parquet and HDF5 export)",
+            "pyarrow (optional, Parquet export)",
+            "tables (optional, HDF5 export)",
             "sentence-transformers",
             "chromadb",
             "python-dotenv (optional)"
@@ -1434,7 +2126,9 @@ def setup_requirements():
             "4. Verify installation: ollama list"
         ],
         "Installation Commands": [
-            "pip install requests pandas numpy openpyxl",
+            "pip install requests xlsxwriter orjson",
+            "pip install openpyxl  # optional, Excel fallback",
+            "pip install pandas pyarrow tables  # optional, Parquet/HDF5 export",
             "pip install sentence-transformers chromadb",
             "pip install python-dotenv  # optional"
         ]
@@ -1475,6 +2169,10 @@ def quick_demo():
         # Quick analysis of Ella
         result = agent.analyze_land_with_rag("Ella", 60000)
         
+        if "error" in result:
+            print(f"❌ Analysis failed: {result['error']}")
+            return None
+        
         print(f"✅ Analysis completed!")
         print(f"📊 Generated {len(result['data'])} characters of analysis")
         print(f"🏡 Available parcels in area: {result['available_parcels']}")
@@ -1494,7 +2192,9 @@ def quick_demo():
         return None
 
 if __name__ == "__main__":
-    import sys
+    # The banners are emoji-heavy; don't let a legacy console code page (e.g. cp1252 on Windows) reject them
+    if hasattr(sys.stdout, "reconfigure"):
+        sys.stdout.reconfigure(encoding="utf-8")
     
     if len(sys.argv) > 1:
         if sys.argv[1] == "setup":
@@ -1518,9 +2218,17 @@ if __name__ == "__main__":
         print("💡 Tip: Use 'python script.py setup' for requirements")
         print()
         
+        # Only the outcome matters from here on; drop the results so the banners don't keep them alive
         results = main()
+        success = results is not None
+        failed_reports, total_reports = count_failed_reports(results) if success else (0, 0)
+        del results
         
-        if results:
+        if success and failed_reports:
+            print("\n" + "="*60)
+            print(f"⚠️  PARTIAL: {failed_reports} of {total_reports} reports failed")
+            print("📁 Check generated files; failed sections show their error")
+        elif success:
             print("\n" + "="*60)
             print("✅ SUCCESS: RAG-Enhanced Real Estate Analysis Complete!")
             print("📁 Check generated files for detailed reports")